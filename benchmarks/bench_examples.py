@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2015)
+
+"""Benchmarks of the compute path of each of the LAAC examples
+
+Each benchmark runs the code for one stage of an example, compiled straight
+from the script in the `examples/` directory, with the NDS2, segment
+database, and trigger file queries answered using the synthetic data from
+`conftest.py`.
+If an example changes so that a stage can no longer be found, its benchmark
+fails, rather than quietly timing out-of-date code.
+"""
+
+__author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
+
+import ast
+import io
+import os
+
+from matplotlib import use
+use('agg')
+
+from matplotlib import pyplot
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        os.pardir, 'examples')
+
+
+def _render(plot):
+    plot.savefig(io.BytesIO(), format='png')
+    pyplot.close(plot)
+
+
+def _example_code(filename, first, last):
+    """Compile the top-level statements of an example from `first` to `last`
+
+    Each statement is identified by the start of its source code.
+    """
+    path = os.path.join(EXAMPLES, filename)
+    with open(path) as f:
+        source = f.read()
+    tree = ast.parse(source, path)
+    starts = [ast.get_source_segment(source, node) for node in tree.body]
+    try:
+        i0 = next(i for i, s in enumerate(starts) if s.startswith(first))
+        i1 = next(i for i, s in enumerate(starts[i0:], i0) if
+                  s.startswith(last))
+    except StopIteration:
+        raise ValueError("Cannot find statements %r to %r in %s"
+                         % (first, last, filename))
+    tree.body = tree.body[i0:i1 + 1]
+    return compile(tree, path, 'exec')
+
+
+def _run(code, **namespace):
+    exec(code, namespace)
+    return namespace
+
+
+class _Queries(object):
+    """Stand-in for a GWpy class, whose data queries return synthetic data
+    """
+    def __init__(self, **methods):
+        self.__dict__.update(methods)
+
+
+# -- 2-gw-asd.py --------------------------------------------------------------
+
+def bench_asd(stage, strain):
+    code = _example_code('2-gw-asd.py', 'wasd = ', 'bns = ')
+    stage(_run, code, white=strain)
+
+
+# -- 3-glitch-spectrogram.py --------------------------------------------------
+
+def bench_glitch_spectrogram(stage, strain):
+    code = _example_code('3-glitch-spectrogram.py', 'dtype = ', 'medratio = ')
+    stage(_run, code, oaf=strain)
+
+
+# -- 4-guardian-segments.py ---------------------------------------------------
+
+def bench_guardian_segments(stage, lockstate):
+    code = _example_code('4-guardian-segments.py', 'dcreadout = ',
+                         'reallocklosses = ')
+    stage(_run, code, lockstate=lockstate)
+
+
+# -- 5-blrms.py ---------------------------------------------------------------
+
+def bench_blrms_plot(stage, trends):
+    from gwpy.plotter import TimeSeriesPlot
+    code = _example_code('5-blrms.py', 'plot = ', 'plot.axes[0].set_title(')
+
+    def blrms_plot():
+        _render(_run(code, lho=trends[0], llo=trends[1],
+                     TimeSeriesPlot=TimeSeriesPlot)['plot'])
+    stage(blrms_plot)
+
+
+# -- 6-ascii-triggers.py, 7-omicron.py ----------------------------------------
+
+def bench_trigger_read(stage, triggerfile):
+    from gwpy.table.lsctables import SnglBurstTable
+    code = _example_code('6-ascii-triggers.py', 'triggers = ', 'triggers = ')
+    table = _Queries(read=lambda source, **kwargs: SnglBurstTable.read(
+        triggerfile, **kwargs))
+    stage(_run, code, SnglBurstTable=table)
+
+
+def bench_trigger_filter(stage, triggerfile, segments):
+    from gwpy.table.lsctables import SnglBurstTable
+    triggers = SnglBurstTable.read(
+        triggerfile, columns=['time', 'peak_frequency', 'snr'])
+    code = _example_code('7-omicron.py', 'triggers = ', 'triggers = ')
+    # only time the filter, not the read
+    table = _Queries(fetch=lambda *args, **kwargs: [
+        t for t in triggers if kwargs['filt'](t)])
+    stage(_run, code, SnglBurstTable=table, locksegs=segments)
+
+
+# -- 8-segment-spectrogram.py -------------------------------------------------
+
+def _segment_spectrogram_inputs(strain, segments):
+    return {
+        'locksegs': segments,
+        'TimeSeries': _Queries(
+            fetch=lambda channel, start, end: strain.crop(start, end)),
+    }
+
+
+def bench_segment_spectrogram(stage, strain, segments):
+    code = _example_code('8-segment-spectrogram.py', 'dtype = ',
+                         'for segment in ')
+    stage(_run, code, **_segment_spectrogram_inputs(strain, segments))
+
+
+def bench_segment_spectrogram_plot(stage, strain, segments):
+    specgrams = _run(
+        _example_code('8-segment-spectrogram.py', 'dtype = ',
+                      'for segment in '),
+        **_segment_spectrogram_inputs(strain, segments))
+    code = _example_code('8-segment-spectrogram.py', 'import numpy',
+                         'plot.add_state_segments(')
+
+    def segment_spectrogram_plot():
+        _render(_run(code, locksegs=segments, dtype=specgrams['dtype'],
+                     specgrams=specgrams['specgrams'])['plot'])
+    stage(segment_spectrogram_plot)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2015)
+
+"""Benchmarks of the time taken to import the GWpy modules used by the examples
+
+Each module is imported five times, each time in a fresh interpreter, so
+that nothing is already cached in `sys.modules`, and the best of the five
+times is recorded.
+If `--import-budget` is given, the benchmark fails if that time is longer
+than the budget.
+"""
+
+__author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
+
+import sys
+import subprocess
+
+import pytest
+
+MODULES = [
+    'gwpy.timeseries',
+    'gwpy.segments',
+    'gwpy.spectrogram',
+    'gwpy.table.lsctables',
+    'gwpy.plotter',
+]
+
+IMPORT_TIMER = ('import time; t = time.perf_counter(); import %s; '
+                'print(time.perf_counter() - t)')
+
+
+def _import_time(module):
+    return float(subprocess.check_output(
+        [sys.executable, '-c', IMPORT_TIMER % module]))
+
+
+@pytest.mark.parametrize('module', MODULES)
+def bench_import(benchmark, import_budget, module):
+    times = []
+    benchmark.pedantic(lambda: times.append(_import_time(module)),
+                       rounds=5, iterations=1)
+    benchmark.extra_info['import_time'] = best = min(times)
+    if import_budget is None:
+        return
+    assert best <= import_budget, (
+        'importing %s took %.2f seconds (budget: %.2f seconds)'
+        % (module, best, import_budget))
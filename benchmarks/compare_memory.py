@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2015)
+
+"""Compare the peak memory usage of each stage between two benchmark runs
+
+The inputs should be JSON files saved by `pytest --benchmark-autosave`
+(or `--benchmark-save`), normally found under `.benchmarks/`.
+"""
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+import sys
+import json
+import argparse
+
+# -----------------------------------------------------------------------------
+# parse command line
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('reference', metavar='reference.json',
+                    help='benchmark results to compare against')
+parser.add_argument('current', metavar='current.json',
+                    help='new benchmark results')
+parser.add_argument('-t', '--threshold', type=float, default=10.,
+                    help='percentage increase in peak memory above which a '
+                         'stage is considered a regression, '
+                         'default: %(default)s')
+
+args = parser.parse_args()
+
+# -----------------------------------------------------------------------------
+# compare results
+
+
+def read_peak_memory(filename):
+    with open(filename) as f:
+        data = json.load(f)
+    return dict((b['name'], b['extra_info'].get('peak_memory')) for
+                b in data['benchmarks'])
+
+reference = read_peak_memory(args.reference)
+current = read_peak_memory(args.current)
+
+regressions = []
+print('%-40s %12s %12s %8s' % ('Stage', 'Before [MB]', 'After [MB]', 'Change'))
+for name in sorted(set(reference) & set(current)):
+    before, after = reference[name], current[name]
+    if not before or after is None:
+        continue
+    change = (after - before) / float(before) * 100
+    print('%-40s %12.1f %12.1f %+7.1f%%' % (name, before / 2.**20,
+                                           after / 2.**20, change))
+    if change > args.threshold:
+        regressions.append(name)
+
+if regressions:
+    print('\nPeak memory increased by more than %s%% for: %s'
+          % (args.threshold, ', '.join(regressions)))
+    sys.exit(1)
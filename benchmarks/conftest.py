@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2015)
+
+"""Synthetic data and fixtures for the LAAC example benchmarks
+
+Each data set is generated from its own, fixed, random seed, so that results
+can be compared from one commit to the next, whichever benchmarks are run.
+"""
+
+__author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
+
+import tracemalloc
+
+import numpy
+import pytest
+
+GPS = 1109332816
+SAMPLE_RATE = 4096
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('laac', 'LAAC example benchmarks')
+    group.addoption('--bench-duration', type=float, default=256.,
+                    help='duration (seconds) of synthetic strain data, '
+                         'default: %(default)s')
+    group.addoption('--bench-triggers', type=int, default=100000,
+                    help='number of synthetic event triggers, '
+                         'default: %(default)s')
+    group.addoption('--bench-seed', type=int, default=1,
+                    help='random seed for synthetic data, '
+                         'default: %(default)s')
+    group.addoption('--import-budget', type=float, default=None,
+                    help='maximum time (seconds) allowed to import each '
+                         'GWpy module, default: no limit')
+
+
+@pytest.fixture(scope='session')
+def duration(request):
+    return request.config.getoption('--bench-duration')
+
+
+@pytest.fixture(scope='session')
+def import_budget(request):
+    return request.config.getoption('--import-budget')
+
+
+@pytest.fixture(scope='session')
+def seed(request):
+    return request.config.getoption('--bench-seed')
+
+
+@pytest.fixture(scope='session')
+def strain(seed, duration):
+    """Gaussian noise at 4096 Hz, standing in for `L1:OAF-CAL_DARM_DQ`
+    """
+    from gwpy.timeseries import TimeSeries
+    rng = numpy.random.RandomState(seed)
+    return TimeSeries(rng.normal(size=int(duration * SAMPLE_RATE)),
+                      sample_rate=SAMPLE_RATE, epoch=GPS,
+                      channel='L1:OAF-CAL_DARM_DQ')
+
+
+@pytest.fixture(scope='session')
+def lockstate(seed, duration):
+    """A 16 Hz Guardian state record, switching between random states
+    """
+    from gwpy.timeseries import TimeSeries
+    rng = numpy.random.RandomState(seed)
+    rate = 16
+    nruns = max(int(duration // 8), 1)
+    states = rng.choice([2, 100, 500], size=nruns)
+    lengths = rng.randint(1, int(16 * rate), size=nruns)
+    data = numpy.repeat(states, lengths)[:int(duration * rate)]
+    return TimeSeries(data, sample_rate=rate, epoch=GPS,
+                      channel='H1:GRD-ISC_LOCK_STATE_N')
+
+
+@pytest.fixture(scope='session')
+def trends(seed, duration):
+    """Two `TimeSeriesDict` of 1 Hz BLRMS trends, for H1 and L1
+
+    The trends are 16 times longer than the strain data, e.g. 256 seconds
+    of strain gives just over an hour of trends.
+    """
+    from gwpy.timeseries import (TimeSeries, TimeSeriesDict)
+    rng = numpy.random.RandomState(seed)
+    out = []
+    for ifo in ('H1', 'L1'):
+        tsd = TimeSeriesDict()
+        for axis in 'XYZ':
+            name = '%s:ISI-BS_ST1_SENSCOR_GND_STS_%s_BLRMS_30M_100M' % (
+                ifo, axis)
+            tsd[name] = TimeSeries(
+                numpy.abs(rng.lognormal(size=int(duration * 16))),
+                sample_rate=1, epoch=GPS, channel=name)
+        out.append(tsd)
+    return out
+
+
+@pytest.fixture(scope='session')
+def segments(duration):
+    """A `DataQualityFlag` with alternating 'lock' segments
+    """
+    from gwpy.segments import (DataQualityFlag, Segment)
+    step = duration / 8.
+    return DataQualityFlag(
+        'L1:DMT-DC_READOUT_LOCKED:1', known=[Segment(GPS, GPS + duration)],
+        active=[Segment(GPS + i * step, GPS + (i + 1) * step) for
+                i in range(0, 8, 2)])
+
+
+@pytest.fixture(scope='session')
+def triggerfile(seed, duration, request, tmpdir_factory):
+    """An ASCII file of (time, peak_frequency, snr) event triggers
+    """
+    rng = numpy.random.RandomState(seed)
+    n = request.config.getoption('--bench-triggers')
+    data = numpy.column_stack((
+        GPS + numpy.sort(rng.uniform(0, duration, size=n)),
+        10 ** rng.uniform(1, 3.5, size=n),
+        3 + rng.pareto(2, size=n),
+    ))
+    path = str(tmpdir_factory.mktemp('triggers').join('triggers.txt'))
+    numpy.savetxt(path, data)
+    return path
+
+
+@pytest.fixture
+def stage(benchmark):
+    """Benchmark a function, recording its peak memory usage
+
+    The function is run once under `tracemalloc` to measure the peak memory
+    allocated, which is stored in the benchmark's `extra_info`, and then
+    timed as normal.
+    """
+    def run(func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            benchmark.extra_info['peak_memory'] = (
+                tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        return benchmark(func, *args, **kwargs)
+    return run
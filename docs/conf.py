@@ -25,6 +25,9 @@ import sphinx_bootstrap_theme
 from matplotlib import use
 use('agg')
 
+# tools for the docs build (e.g. gwpytrace.py) live in this directory
+sys.path.insert(0, os.path.abspath('.'))
+
 from gwpy.plotter import GWPY_PLOT_PARAMS
 
 # -- General configuration ------------------------------------------------
@@ -304,3 +307,17 @@ doxylink = {'lalsuite': ('lalsuite_dox.tag',
 plot_rcparams = GWPY_PLOT_PARAMS
 plot_apply_rcparams = True
 plot_formats = ['png']
+
+
+# -- Tracing --------------------------------------------------------------
+
+def _init_tracing(app):
+    # record GWpy calls made while running the examples if GWPY_TRACE is
+    # set, see gwpytrace.py for details
+    if os.environ.get('GWPY_TRACE'):
+        import gwpytrace
+        gwpytrace.enable_from_env()
+
+
+def setup(app):
+    app.connect('builder-inited', _init_tracing)
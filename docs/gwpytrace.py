@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2015)
+
+"""Record timed spans for GWpy data access, signal processing, and plotting
+
+Tracing wraps the main GWpy methods used by the examples (`fetch`,
+`query_dqsegdb`, `asd`, `spectrogram`, `zpk`, `ratio`, plot rendering, ...)
+and records the duration of each call, the size of its input and output
+arrays, and (optionally) the memory allocated during the call.
+
+Tracing can be enabled
+
+- by setting the `GWPY_TRACE` environment variable to the name of an output
+  file and calling `enable_from_env` (as `docs/conf.py` does),
+- using the `tracing` context manager, or
+- by running a script through this module:
+
+  .. code-block:: bash
+
+     python gwpytrace.py -o trace.json ../examples/8-segment-spectrogram.py
+
+Output files ending in `.json` are written in the Chrome trace-event format,
+which can be loaded into `chrome://tracing` or https://ui.perfetto.dev,
+anything else is written as a plain-text summary table.
+Set `GWPY_TRACE_ALLOCATIONS=1` to also record memory allocations using
+`tracemalloc` (this slows everything down).
+"""
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+import os
+import sys
+import json
+import time
+import atexit
+import argparse
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# (module, class, category, method names) for each set of methods to trace
+TRACED = [
+    ('gwpy.timeseries', 'TimeSeries', 'fetch', ['fetch', 'read']),
+    ('gwpy.timeseries', 'TimeSeriesDict', 'fetch', ['fetch', 'read']),
+    ('gwpy.timeseries', 'StateVector', 'fetch', ['fetch', 'read']),
+    ('gwpy.segments', 'DataQualityFlag', 'fetch', ['query_dqsegdb', 'query']),
+    ('gwpy.table.lsctables', 'SnglBurstTable', 'fetch', ['fetch', 'read']),
+    ('gwpy.timeseries', 'TimeSeries', 'compute',
+     ['asd', 'psd', 'spectrogram', 'spectrogram2']),
+    ('gwpy.spectrum', 'Spectrum', 'compute', ['zpk']),
+    ('gwpy.spectrogram', 'Spectrogram', 'compute', ['zpk', 'ratio']),
+    ('gwpy.plotter', 'Plot', 'plot',
+     ['show', 'save', 'savefig', 'add_colorbar', 'add_state_segments']),
+    ('gwpy.plotter', 'SpectrogramAxes', 'plot', ['plot']),
+]
+
+
+def _nbytes(obj):
+    """Return the number of bytes of data held by an object, or `None`
+    """
+    if hasattr(obj, 'nbytes'):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        sizes = [_nbytes(value) for value in obj.values()]
+        return sum(s for s in sizes if s is not None)
+    if isinstance(obj, (list, tuple)):
+        sizes = [_nbytes(value) for value in obj]
+        if sizes and None not in sizes:
+            return sum(sizes)
+    return None
+
+
+def _describe(obj, prefix):
+    """Summarise the size of an object as span arguments
+    """
+    args = {}
+    nbytes = _nbytes(obj)
+    if nbytes is not None:
+        args['%s_bytes' % prefix] = nbytes
+    if hasattr(obj, 'shape'):
+        args['%s_shape' % prefix] = list(obj.shape)
+    elif hasattr(obj, '__len__') and not isinstance(obj, str):
+        args['%s_length' % prefix] = len(obj)
+    return args
+
+
+class Tracer(object):
+    """Record timed spans for calls to GWpy methods
+    """
+    def __init__(self, allocations=False):
+        self.allocations = allocations
+        self.spans = []
+        self._local = threading.local()
+        self._started_tracemalloc = False
+        self._patched = []
+        self._pending = set()
+        self._hook = None
+        self._origin = time.perf_counter()
+
+    # -- recording ------------------------------------------------------------
+
+    @property
+    def _stack(self):
+        """The spans currently open in this thread
+        """
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    @contextmanager
+    def span(self, name, category='user', **args):
+        """Record a span for the duration of a `with` block
+
+        Any keyword arguments are stored with the span; the returned `dict`
+        can be updated inside the block to add more.
+        Spans are nested separately in each thread, but `tracemalloc` counts
+        allocations from all threads, so the memory recorded for spans that
+        run at the same time in different threads includes both.
+        """
+        stack = self._stack
+        frame = {'name': name, 'cat': category, 'args': args}
+        if self.allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['base'] = frame['peak'] = current
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            if self.allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, frame['peak'])
+                args['peak_alloc_bytes'] = peak - frame['base']
+                args['net_alloc_bytes'] = current - frame['base']
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            self.spans.append({
+                'name': name,
+                'cat': category,
+                'ts': (start - self._origin) * 1e6,
+                'dur': duration * 1e6,
+                'tid': threading.current_thread().ident,
+                'depth': len(stack),
+                'args': args,
+            })
+
+    def _wrap(self, func, name, category):
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            with self.span(name, category) as spanargs:
+                if args and category != 'fetch':
+                    spanargs.update(_describe(args[0], 'input'))
+                out = func(*args, **kwargs)
+                spanargs.update(_describe(out, 'output'))
+                return out
+        traced._gwpytrace = True
+        return traced
+
+    # -- patching -------------------------------------------------------------
+
+    def enable(self):
+        """Start tracing the GWpy methods listed in `TRACED`
+
+        Classes in modules that have already been imported are patched
+        straight away, the rest are patched when (if) their module is first
+        imported, so enabling tracing doesn't import anything by itself.
+        Methods that don't exist are skipped.
+        """
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._pending = set(modname for modname, _, _, _ in TRACED)
+        for modname in list(self._pending):
+            if modname in sys.modules:
+                self._patch_module(sys.modules[modname])
+        if self._pending:
+            self._hook = _PatchOnImport(self)
+            sys.meta_path.insert(0, self._hook)
+
+    def _patch_module(self, module):
+        self._pending.discard(module.__name__)
+        for modname, clsname, category, methods in TRACED:
+            cls = getattr(module, clsname, None)
+            if modname != module.__name__ or cls is None:
+                continue
+            for method in methods:
+                self._patch(cls, method, '%s.%s' % (clsname, method),
+                            category)
+        if not self._pending:
+            self._remove_hook()
+
+    def _remove_hook(self):
+        if self._hook in sys.meta_path:
+            sys.meta_path.remove(self._hook)
+        self._hook = None
+
+    def _patch(self, cls, method, name, category):
+        for klass in cls.__mro__:
+            if method in klass.__dict__:
+                raw = klass.__dict__[method]
+                break
+        else:
+            return
+        own = method in cls.__dict__
+        # don't wrap a method twice if it was already wrapped for a parent
+        if getattr(getattr(raw, '__func__', raw), '_gwpytrace', False):
+            return
+        if isinstance(raw, (classmethod, staticmethod)):
+            wrapped = type(raw)(self._wrap(raw.__func__, name, category))
+        elif callable(raw):
+            wrapped = self._wrap(raw, name, category)
+        else:
+            return
+        setattr(cls, method, wrapped)
+        self._patched.append((cls, method, raw if own else None))
+
+    def disable(self):
+        """Stop tracing, and restore the original methods
+        """
+        self._remove_hook()
+        self._pending = set()
+        while self._patched:
+            cls, method, raw = self._patched.pop()
+            if raw is None:
+                delattr(cls, method)
+            else:
+                setattr(cls, method, raw)
+        # only stop tracemalloc if we started it
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    # -- output ---------------------------------------------------------------
+
+    def chrome_trace(self):
+        """Return the spans as a Chrome trace-event `dict`
+        """
+        pid = os.getpid()
+        return {'traceEvents': [{
+            'name': span['name'],
+            'cat': span['cat'],
+            'ph': 'X',
+            'ts': span['ts'],
+            'dur': span['dur'],
+            'pid': pid,
+            'tid': span['tid'],
+            'args': span['args'],
+        } for span in self.spans]}
+
+    def summary(self):
+        """Return a plain-text table of the total time spent in each method
+
+        Times are inclusive, so a span contains the time of any spans
+        nested within it.
+        """
+        totals = {}
+        for span in self.spans:
+            entry = totals.setdefault(span['name'], [span['cat'], 0, 0., 0])
+            entry[1] += 1
+            entry[2] += span['dur'] / 1e6
+            entry[3] = max(entry[3], span['args'].get('output_bytes', 0),
+                           span['args'].get('peak_alloc_bytes', 0))
+        lines = ['%-36s %-8s %6s %10s %10s %10s' % (
+            'Name', 'Category', 'Calls', 'Total [s]', 'Mean [s]', 'Max [MB]')]
+        for name, (cat, calls, total, nbytes) in sorted(
+                totals.items(), key=lambda x: x[1][2], reverse=True):
+            lines.append('%-36s %-8s %6d %10.3f %10.3f %10.1f' % (
+                name, cat, calls, total, total / calls, nbytes / 2.**20))
+        return '\n'.join(lines)
+
+    def write(self, filename):
+        """Write the spans to a file
+
+        Files ending in `.json` are written as a Chrome trace, anything else
+        as a summary table.
+        """
+        if filename.endswith('.json'):
+            with open(filename, 'w') as f:
+                json.dump(self.chrome_trace(), f)
+        else:
+            with open(filename, 'w') as f:
+                f.write(self.summary() + '\n')
+
+
+class _PatchOnImport(object):
+    """Import hook that patches traced classes once their module is imported
+    """
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in self.tracer._pending:
+            return None
+        # find the module using the other finders
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+        exec_module = spec.loader.exec_module
+
+        def _exec_module(module):
+            exec_module(module)
+            self.tracer._patch_module(module)
+        spec.loader.exec_module = _exec_module
+        return spec
+
+
+@contextmanager
+def tracing(outfile=None, allocations=False):
+    """Trace GWpy calls for the duration of a `with` block
+
+    If `outfile` is given, the spans are written to it on exit.
+    """
+    tracer = Tracer(allocations=allocations)
+    tracer.enable()
+    try:
+        yield tracer
+    finally:
+        tracer.disable()
+        if outfile:
+            tracer.write(outfile)
+
+
+def enable_from_env():
+    """Start tracing if the `GWPY_TRACE` environment variable is set
+
+    The spans are written to the file named by `GWPY_TRACE` when the
+    process exits. Returns the `Tracer`, or `None`.
+    """
+    outfile = os.environ.get('GWPY_TRACE')
+    if not outfile:
+        return None
+    allocations = os.environ.get('GWPY_TRACE_ALLOCATIONS', '0') not in (
+        '', '0', 'false', 'no')
+    tracer = Tracer(allocations=allocations)
+    tracer.enable()
+    atexit.register(tracer.write, outfile)
+    return tracer
+
+
+# -----------------------------------------------------------------------------
+# run a script with tracing enabled
+
+if __name__ == '__main__':
+    import runpy
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('script', metavar='example.py',
+                        help='python script to run')
+    parser.add_argument('-o', '--output-file', default='gwpy-trace.json',
+                        help='file in which to write trace, '
+                             'default: %(default)s')
+    parser.add_argument('-a', '--allocations', action='store_true',
+                        default=False,
+                        help='record memory allocations, default: %(default)s')
+    args = parser.parse_args()
+
+    from matplotlib import use
+    use('agg')
+
+    sys.argv = [args.script]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    with tracing(args.output_file, allocations=args.allocations) as tracer:
+        runpy.run_path(args.script, run_name='__main__')
+    print(tracer.summary())
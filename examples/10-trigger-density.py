@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2015)
+
+"""How to plot millions of event triggers
+
+In the `Omicron example <7-omicron.html>`_ we plotted one day of triggers,
+drawing one marker per trigger.
+For a month of Omicron triggers (millions of rows) that gets very slow, and
+uses a lot of memory, so here we show how to bin the triggers onto a
+time-frequency pixel grid, and draw that as a single image, switching back
+to individual markers only when zoomed in far enough.
+
+.. note::
+
+   As with the Omicron example, this will only work from the LLO cluster,
+   e.g. from `ldas-pcdev1.ligo-la.caltech.edu`
+"""
+
+__author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
+
+# First, we fetch the Omicron triggers for the `L1:OAF-CAL_DARM_DQ` channel
+# for the whole of March 2015:
+
+from gwpy.table.lsctables import SnglBurstTable
+triggers = SnglBurstTable.fetch(
+    'L1:OAF-CAL_DARM_DQ', 'omicron', 'March 1 2015', 'April 1 2015')
+
+# Then we extract the columns we want to plot as `numpy` arrays, sorted by
+# time, so that we can quickly find the triggers inside any time interval:
+
+import numpy
+from gwpy.table.utils import get_table_column
+times = get_table_column(triggers, 'time')
+order = numpy.argsort(times)
+times = times[order]
+freqs = get_table_column(triggers, 'peak_frequency')[order]
+snrs = get_table_column(triggers, 'snr')[order]
+
+# Next, we define a function to bin the triggers onto a time-frequency grid,
+# recording either the loudest SNR, or the number of triggers, in each pixel.
+# This is all done using vectorised `numpy` operations, with
+# `numpy.maximum.at` keeping the loudest SNR in each pixel:
+
+
+def bin_triggers(tbins, fbins, reduce='max'):
+    i0, i1 = numpy.searchsorted(times, tbins[[0, -1]])
+    ix = numpy.searchsorted(tbins, times[i0:i1], side='right') - 1
+    iy = numpy.searchsorted(fbins, freqs[i0:i1], side='right') - 1
+    keep = (ix < tbins.size - 1) & (iy >= 0) & (iy < fbins.size - 1)
+    flat = iy[keep] * (tbins.size - 1) + ix[keep]
+    shape = (fbins.size - 1, tbins.size - 1)
+    if reduce == 'count':
+        grid = numpy.bincount(flat, minlength=shape[0] * shape[1])
+    else:
+        grid = numpy.zeros(shape[0] * shape[1])
+        numpy.maximum.at(grid, flat, snrs[i0:i1][keep])
+    return numpy.ma.masked_equal(grid.reshape(shape), 0)
+
+# Now we can make a blank plot, setting up the axes and the colour
+# normalisation we will use for the SNR.
+# We add the colour bar (attached to an, as yet empty, image) straight
+# away, so that the axes already have their final size when we draw the
+# first view, and we turn off autoscaling, so that adding new artists
+# doesn't move the limits:
+
+from matplotlib.colors import LogNorm
+from gwpy.plotter import TimeSeriesPlot
+plot = TimeSeriesPlot()
+ax = plot.gca()
+ax.set_yscale('log')
+ax.set_ylim(8, 4096)
+ax.set_autoscale_on(False)
+ax.set_ylabel('Frequency [Hz]')
+ax.set_title('L1 gravitational-wave strain [$h(t)$], March 2015')
+norm = LogNorm(vmin=3, vmax=50)
+image = ax.imshow(numpy.ma.masked_all((1, 1)), norm=norm, origin='lower',
+                  extent=(0, 1, 0, 1), transform=ax.transAxes,
+                  aspect='auto', interpolation='nearest')
+plot.add_colorbar(mappable=image, log=True, clim=[3, 50],
+                  label='Signal-to-noise ratio (SNR)')
+
+# To switch to individual markers when zoomed in, we create an (empty)
+# scatter collection sharing the same colour normalisation, and connect a
+# function to redraw the view whenever the axis limits change.
+# If there are few enough triggers in view, we show them as markers,
+# otherwise we bin the triggers in view onto a fresh grid, using one bin
+# per pixel of the axes, with logarithmically-spaced frequency bins, so
+# the cost of drawing the plot is set by the size of the figure, not by
+# the number of triggers.
+# Because the grid always covers exactly the visible axes, we draw it as
+# an image in axes coordinates (`transform=ax.transAxes`), and when the
+# view changes we just replace its pixels with `set_data`, so the image
+# (and the colour bar attached to it) is never re-created:
+
+markers = ax.scatter([], [], c=[], norm=norm, edgecolor='none')
+maxmarkers = 20000
+
+
+def update_view(ax):
+    xmin, xmax = ax.get_xlim()
+    i0, i1 = numpy.searchsorted(times, [xmin, xmax])
+    zoomed = i1 - i0 <= maxmarkers
+    markers.set_visible(zoomed)
+    image.set_visible(not zoomed)
+    if zoomed:
+        markers.set_offsets(numpy.column_stack((times[i0:i1], freqs[i0:i1])))
+        markers.set_array(snrs[i0:i1])
+    else:
+        nx, ny = [max(int(n), 1) for n in ax.bbox.size]
+        ymin, ymax = ax.get_ylim()
+        tbins = numpy.linspace(xmin, xmax, nx + 1)
+        fbins = numpy.logspace(numpy.log10(ymin), numpy.log10(ymax), ny + 1)
+        image.set_data(bin_triggers(tbins, fbins))
+
+ax.callbacks.connect('xlim_changed', update_view)
+ax.callbacks.connect('ylim_changed', update_view)
+
+# Finally, setting the x-axis limits draws the first view:
+
+start, end = 1109203216, 1111881616
+ax.set_epoch(start)
+ax.set_xlim(start, end)
+plot.show()
+
+# If you would rather see how many triggers there are in each pixel, use
+# `reduce='count'` when calling `bin_triggers` in `update_view`, and give the
+# image its own normalisation, e.g. `LogNorm(vmin=1, vmax=1000)`, and colour
+# bar, labelled e.g. 'Triggers per pixel' (the markers still show SNR, so
+# you may also want to set `maxmarkers = 0`, to always show the density).
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2015)
+
+"""How to calculate band-limited RMS trends from raw seismometer data
+
+In the `BLRMS example <5-blrms.html>`_ we used the band-limited RMS (BLRMS)
+trends recorded by the front-end system.
+If you need a band that isn't recorded, you have to calculate it yourself
+from the raw data, which can mean reading and filtering a lot of data.
+
+In this example we show how to calculate the BLRMS for a number of bands,
+for a number of channels, by reading the raw data in chunks, and carrying
+the state of each filter from one chunk to the next, so that the memory
+required doesn't depend on how much data we need.
+"""
+
+__author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
+__currentmodule__ = 'gwpy.timeseries'
+
+# First, we import the objects we need:
+import numpy
+from scipy import signal
+from gwpy.time import to_gps
+from gwpy.timeseries import (TimeSeries, TimeSeriesDict)
+
+# Next, we define the raw ground-motion channels, the frequency bands we
+# want, and the stride (in seconds) of the output trends:
+channels = [
+    'H1:ISI-GND_STS_ITMY_X_DQ',
+    'H1:ISI-GND_STS_ITMY_Y_DQ',
+    'H1:ISI-GND_STS_ITMY_Z_DQ',
+]
+bands = [(0.03, 0.1), (0.1, 0.3), (0.3, 1), (1, 3), (3, 10)]
+stride = 1
+
+# Now we define a function to process one chunk of data.
+# For each channel, and each band, we design a band-pass filter the first
+# time we see it, using second-order sections (SOS) for numerical stability
+# at low frequencies, then filter the new data, starting from the filter
+# state left over from the previous chunk.
+# The RMS is then calculated for each `stride` using `numpy`, and appended
+# to the output, recording the unit of the raw data for each trend.
+# If a chunk doesn't contain a whole number of strides, the samples left
+# over at the end are kept, and processed at the start of the next chunk,
+# so the trends are the same however the data are split up:
+
+filters = {}
+trends = {}
+units = {}
+leftover = {}
+
+
+def process(data):
+    for name, ts in data.items():
+        fs = ts.sample_rate.value
+        nstride = int(stride * fs)
+        x = numpy.concatenate((leftover.get(name, ts.value[:0]), ts.value))
+        n = x.size // nstride * nstride
+        x, leftover[name] = x[:n], x[n:]
+        if not n:
+            continue
+        for flow, fhigh in bands:
+            key = '%s_BLRMS_%s_%s' % (name, flow, fhigh)
+            if key not in filters:
+                sos = signal.butter(4, [flow / (fs / 2.), fhigh / (fs / 2.)],
+                                    btype='bandpass', output='sos')
+                filters[key] = (sos, signal.sosfilt_zi(sos) * x[0])
+                trends[key] = []
+                units[key] = ts.unit
+            sos, zi = filters[key]
+            y, zi = signal.sosfilt(sos, x, zi=zi)
+            filters[key] = (sos, zi)
+            trends[key].append(
+                numpy.sqrt((y ** 2).reshape(-1, nstride).mean(axis=1)))
+
+# Then we loop over the interval we want, one hour at a time, fetching the
+# raw data and processing them.
+# Only one hour of raw data is ever held in memory, along with the (much
+# smaller) trends, so the same loop can be used for a week of data just as
+# easily as for a few hours:
+
+start = int(to_gps('Feb 13 2015 16:00'))
+end = int(to_gps('Feb 14 2015 04:00'))
+chunk = 3600
+for t in range(start, end, chunk):
+    process(TimeSeriesDict.fetch(channels, t, min(t + chunk, end)))
+
+# Finally, we pack the trends into a `TimeSeriesDict`:
+blrms = TimeSeriesDict()
+for key in sorted(trends):
+    blrms[key] = TimeSeries(numpy.concatenate(trends[key]), epoch=start,
+                            sample_rate=1./stride, unit=units[key], name=key)
+
+# .. note::
+#
+#    The filters need some time to settle at the start of the first chunk,
+#    especially for the lowest frequency band, so it is worth starting a
+#    little earlier than you need, and cropping the result.
+#
+# We can now plot the 0.03-0.1 Hz band for each axis, just like the
+# trends we read in the BLRMS example:
+from gwpy.plotter import TimeSeriesPlot
+lowband = TimeSeriesDict((c, blrms['%s_BLRMS_0.03_0.1' % c]) for c in channels)
+plot = TimeSeriesPlot(lowband)
+ax = plot.gca()
+ax.legend(['X', 'Y', 'Z'])
+ax.set_yscale('log')
+ax.set_ylabel(r'$0.03-0.1$\,Hz motion [nm/s]')
+ax.set_title('Magnitude 7.1 earthquake impact on LHO')
+plot.show()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2015)
+
+"""How to read data quickly from local frame files
+
+In the `h(t) spectrum example <2-gw-asd.html>`_ we noted that the data could
+have been read directly from frames, rather than fetched using NDS2.
+On the LIGO Data Grid computing nodes, reading the local GWF files is much
+faster than NDS2, as long as you can find the right files quickly.
+
+In this example we build a simple catalogue of local frame files, indexed
+by observatory, frame type, and GPS interval, and use it to read only those
+files that we need, reading the files in parallel, and filling one
+pre-allocated array for each channel.
+
+.. note::
+
+   This example will only work on a machine with frame files on local disk,
+   e.g. on `ldas-pcdev1.ligo-la.caltech.edu`
+"""
+
+__author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
+__currentmodule__ = 'gwpy.timeseries'
+
+# Frame files are named using the LIGO convention
+# `<obs>-<type>-<gps-start>-<duration>.gwf`, e.g.
+# `L-L1_R-1109332800-32.gwf`, so all of the information we need is in the
+# file name.
+#
+# First, we walk the frame archive once, parse each of the file names, and
+# store them in a catalogue, keyed by observatory and frame type.
+# Within each key, we group the files by duration (an archive normally only
+# has one or two different file durations), and for each duration we store
+# the start times and paths, sorted by start time.
+# The catalogue is then saved to disk, so this only needs to be done once;
+# if the file already exists, we just load it back:
+
+import os
+import re
+import json
+import bisect
+import numpy
+
+FRAME_NAME = re.compile(r'\A(?P<obs>[A-Z]+)-(?P<type>[\w-]+)-'
+                        r'(?P<start>\d+)-(?P<duration>\d+)\.gwf\Z')
+
+
+def build_catalogue(root, outfile):
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for f in filenames:
+            match = FRAME_NAME.match(f)
+            if match:
+                key = '%s-%s' % (match.group('obs'), match.group('type'))
+                files.setdefault(key, {}).setdefault(
+                    match.group('duration'), []).append(
+                    (int(match.group('start')), os.path.join(dirpath, f)))
+    catalogue = {}
+    for key, groups in files.items():
+        catalogue[key] = {}
+        for duration, entries in groups.items():
+            entries.sort()
+            catalogue[key][duration] = {
+                'start': [e[0] for e in entries],
+                'path': [e[1] for e in entries],
+            }
+    with open(outfile, 'w') as f:
+        json.dump(catalogue, f)
+    return catalogue
+
+if os.path.isfile('L1_R.json'):
+    with open('L1_R.json') as f:
+        catalogue = json.load(f)
+else:
+    catalogue = build_catalogue('/archive/frames/A6/L1_R', 'L1_R.json')
+
+# Next we write a function to find the files that overlap a given GPS
+# interval `[start, end)`.
+# A file of duration `d` overlaps the interval only if it starts after
+# `start - d`, and before `end`, so, because the start times in each group
+# are sorted, we can find exactly the files we need with two binary
+# searches (using the `bisect` module, which searches the lists from the
+# catalogue in place) for each duration.
+# Each query then takes `O(D log N)` time, plus the number of files
+# returned, for `N` files with `D` different durations, even if some files
+# overlap:
+
+
+def find_frames(catalogue, obs, frametype, start, end):
+    frames = []
+    for duration, index in catalogue['%s-%s' % (obs, frametype)].items():
+        duration = int(duration)
+        i0 = bisect.bisect_right(index['start'], start - duration)
+        i1 = bisect.bisect_left(index['start'], end)
+        frames.extend((index['start'][i], index['start'][i] + duration,
+                       index['path'][i]) for i in range(i0, i1))
+    return sorted(frames)
+
+# Now we can write a function to read data for a list of channels.
+# First, we check that the files we found cover the whole interval, then we
+# allocate one output array per channel, read each file in a separate
+# thread, cropping to the interval we want, and copy the data straight into
+# the right slice of each output array, rather than reading everything into
+# a list and concatenating at the end (which would need twice the memory):
+
+from multiprocessing.pool import ThreadPool
+from gwpy.timeseries import (TimeSeries, TimeSeriesDict)
+
+
+def read_frames(catalogue, channels, frametype, start, end, nproc=4):
+    obs = channels[0][0]  # e.g. 'L' for 'L1:OAF-CAL_DARM_DQ'
+    frames = find_frames(catalogue, obs, frametype, start, end)
+    covered = start
+    for fstart, fend, _ in frames:
+        if fstart > covered:
+            break
+        covered = max(covered, fend)
+    if covered < end:
+        raise ValueError("No %s-%s frames found for [%s, %s)"
+                         % (obs, frametype, covered, end))
+
+    def _crop(frame):
+        return max(start, frame[0]), min(end, frame[1])
+
+    def _fill(fstart, data):
+        for channel in channels:
+            ts, array = data[channel], out[channel]
+            i = int(round((fstart - start) * ts.sample_rate.value))
+            n = min(ts.size, array.size - i)
+            array[i:i + n] = ts.value[:n]
+
+    def _read(frame):
+        fstart, fend = _crop(frame)
+        _fill(fstart, TimeSeriesDict.read(frame[2], channels, start=fstart,
+                                          end=fend))
+
+    # read the first file to find the sample rate and type of each channel
+    fstart, fend = _crop(frames[0])
+    first = TimeSeriesDict.read(frames[0][2], channels, start=fstart,
+                                end=fend)
+    out = dict((c, numpy.zeros(int((end - start) *
+                                   first[c].sample_rate.value),
+                               dtype=first[c].dtype)) for c in channels)
+    _fill(fstart, first)
+    pool = ThreadPool(nproc)
+    try:
+        pool.map(_read, frames[1:])
+    finally:
+        pool.close()
+    return TimeSeriesDict(
+        (c, TimeSeries(out[c], epoch=start, sample_rate=first[c].sample_rate,
+                       channel=c, unit=first[c].unit)) for c in channels)
+
+# Finally, we can use this to read the same data as in the
+# `h(t) spectrum example <2-gw-asd.html>`_, and calculate the ASD, as before:
+
+data = read_frames(catalogue, ['L1:OAF-CAL_DARM_DQ'], 'L1_R',
+                   1109332816, 1109334616)
+white = data['L1:OAF-CAL_DARM_DQ']
+wasd = white.asd(8, 4)
+dasd = wasd.zpk([100]*5, [1]*5, 1e-10/4000.)
+
+plot = dasd.plot()
+ax = plot.gca()
+ax.set_ylabel(r'GW sensitivity [strain/\rtHz]')
+ax.set_xlabel('Frequency [Hz]')
+ax.set_ylim(5e-24, 1e-19)
+ax.set_xlim(10, 4000)
+ax.set_title('L1 $h(t)$ spectrum (read from frames)')
+plot.show()
+
+# To read more channels from the same frames, just add them to the list;
+# each file is still only opened once.
+# To pick up new files, just delete `L1_R.json` and run the example again.
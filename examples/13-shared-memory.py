@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2015)
+
+"""How to share data with worker processes without copying
+
+Many of the other examples could be sped up by processing each channel, or
+each segment, in a separate process, e.g. using `multiprocessing.Pool`.
+However, by default, every array sent to a worker process is pickled and
+copied, which for large `~gwpy.timeseries.TimeSeries` can take longer than
+the work itself.
+
+In this example we show how to put the data for a
+`~gwpy.timeseries.TimeSeriesDict` into a block of shared memory, so that
+worker processes can operate on the parent's arrays directly, with only a
+small amount of metadata (epoch, sample rate, unit, channel) being sent to
+each worker.
+"""
+
+__author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
+__currentmodule__ = 'gwpy.timeseries'
+
+# First, we import the objects we need:
+import numpy
+from multiprocessing import (Pool, shared_memory)
+from gwpy.timeseries import (TimeSeries, TimeSeriesDict)
+
+# Next, we write a function to export a `TimeSeriesDict` into a single block
+# of shared memory.
+# Each array is copied into the block once, at an aligned offset, and we
+# record the metadata needed to rebuild each `TimeSeries` in a list of
+# simple `dict`, which is cheap to send to the workers:
+
+ALIGN = 64
+
+
+def export_shared(tsdict):
+    offsets = []
+    size = 0
+    for ts in tsdict.values():
+        offsets.append(size)
+        size += -(-ts.nbytes // ALIGN) * ALIGN
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    metadata = []
+    for (name, ts), offset in zip(tsdict.items(), offsets):
+        buf = numpy.ndarray(ts.shape, dtype=ts.dtype, buffer=shm.buf,
+                            offset=offset)
+        buf[:] = ts.value
+        metadata.append({
+            'name': name,
+            'offset': offset,
+            'shape': ts.shape,
+            'dtype': ts.dtype.str,
+            'epoch': float(ts.epoch.gps),
+            'sample_rate': ts.sample_rate.value,
+            'unit': str(ts.unit),
+            'channel': str(ts.channel),
+        })
+    return shm, metadata
+
+# Then we write the matching function to attach to that block from another
+# process, building each `TimeSeries` as a view onto the shared memory,
+# using `copy=False` so that the data are never copied:
+
+
+def attach_shared(shmname, metadata):
+    shm = shared_memory.SharedMemory(name=shmname)
+    tsdict = TimeSeriesDict()
+    for meta in metadata:
+        data = numpy.ndarray(meta['shape'], dtype=meta['dtype'],
+                             buffer=shm.buf, offset=meta['offset'])
+        tsdict[meta['name']] = TimeSeries(
+            data, epoch=meta['epoch'], sample_rate=meta['sample_rate'],
+            unit=meta['unit'], channel=meta['channel'], copy=False)
+    return shm, tsdict
+
+# Now we can write the function that each worker will run, in this case
+# calculating the ASD of a single channel.
+# Only the (small) ASD is pickled and sent back to the parent process.
+# We have to delete our views onto the shared memory before closing it:
+
+
+def channel_asd(args):
+    shmname, metadata, name = args
+    shm, data = attach_shared(shmname, metadata)
+    try:
+        return name, data[name].asd(8, 4)
+    finally:
+        del data
+        shm.close()
+
+# With all of that in place, we can fetch an hour of raw ground-motion data,
+# as in the `raw BLRMS example <11-blrms-from-raw.html>`_:
+
+channels = [
+    'H1:ISI-GND_STS_ITMY_X_DQ',
+    'H1:ISI-GND_STS_ITMY_Y_DQ',
+    'H1:ISI-GND_STS_ITMY_Z_DQ',
+]
+data = TimeSeriesDict.fetch(channels, 'Feb 13 2015 16:00', 'Feb 13 2015 17:00')
+
+# export them to shared memory, and calculate the ASD for each channel in a
+# separate process.
+# Once we're done, we close and `unlink` the shared memory block, which
+# frees it:
+
+shm, metadata = export_shared(data)
+try:
+    with Pool(len(channels)) as pool:
+        asds = dict(pool.map(channel_asd,
+                             [(shm.name, metadata, c) for c in channels]))
+finally:
+    shm.close()
+    shm.unlink()
+
+# Finally, we can plot the ASDs:
+plot = asds[channels[0]].plot(label='X')
+ax = plot.gca()
+ax.plot(asds[channels[1]], label='Y')
+ax.plot(asds[channels[2]], label='Z')
+ax.legend()
+ax.set_xlim(0.01, 128)
+ax.set_ylabel(r'Ground motion [nm/s/\rtHz]')
+ax.set_xlabel('Frequency [Hz]')
+ax.set_title('H1 ITMY ground motion')
+plot.show()
+
+# .. note::
+#
+#    If you need to share the data between separate programs, rather than
+#    between a parent and its workers, the same functions can be written
+#    using a `numpy.memmap` file in place of the shared memory block, keeping
+#    the `metadata` in a JSON file alongside it.
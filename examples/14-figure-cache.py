@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2015)
+
+"""How to avoid re-drawing figures that haven't changed
+
+Summary pages regenerate the same plots (BLRMS trends, trigger maps, lock
+spectrograms, ...) every few minutes, even though most of them haven't
+changed since the last time round.
+
+In this example we build a simple cache of rendered figures, keyed by a
+hash of the input data and of the function that draws the figure, so that
+an unchanged plot costs a hash of its inputs, rather than a full
+`matplotlib` render.
+"""
+
+__author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
+__currentmodule__ = 'gwpy.plotter'
+
+# First, we import the modules we need:
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import numpy
+import matplotlib
+from matplotlib import pyplot
+import gwpy
+
+# Next we write a function to add any input data to a hash.
+# `numpy` arrays (including the `~gwpy.timeseries.TimeSeries` and
+# `~gwpy.spectrogram.Spectrogram`) are hashed using their raw data
+# and their metadata, segment lists are hashed by value, containers are
+# hashed item by item, and functions are hashed by their code (see below):
+
+METADATA = ['epoch', 'sample_rate', 'dt', 'f0', 'df', 'unit', 'name',
+            'channel']
+
+
+def hash_data(h, obj):
+    if isinstance(obj, numpy.ndarray):
+        h.update(repr((type(obj).__name__, obj.dtype.str,
+                       obj.shape)).encode('utf-8'))
+        h.update(numpy.ascontiguousarray(obj).view(numpy.uint8))
+        for attr in METADATA:
+            h.update(repr(getattr(obj, attr, None)).encode('utf-8'))
+    elif isinstance(obj, dict):
+        for key in obj:
+            h.update(repr(key).encode('utf-8'))
+            hash_data(h, obj[key])
+    elif hasattr(obj, 'active') and hasattr(obj, 'known'):
+        h.update(repr((obj.name, list(obj.active),
+                       list(obj.known))).encode('utf-8'))
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            hash_data(h, item)
+    elif hasattr(obj, '__code__'):
+        hash_function(h, obj)
+    else:
+        h.update(repr(obj).encode('utf-8'))
+
+# Rather than recording each styling call (`set_yscale`, `set_title`, ...)
+# one at a time, we put all of the plotting code in a function, and hash
+# the compiled code of that function, along with its default arguments and
+# any variables it closes over, so that any change to the styling gives a
+# new key:
+
+
+def hash_code(h, code):
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode('utf-8'))
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            hash_code(h, const)
+        else:
+            h.update(repr(const).encode('utf-8'))
+
+
+def hash_function(h, func):
+    hash_code(h, func.__code__)
+    hash_data(h, (func.__defaults__, func.__kwdefaults__,
+                  [cell.cell_contents for cell in func.__closure__ or ()]))
+
+# Now we can write the cache itself.
+# Each figure is stored as `<key>.png` in the cache directory.
+# On a hit, we just link (or copy) the stored file to the output location.
+# On a miss (including when another process deletes the file before we can
+# use it), we call the drawing function, save the figure to a temporary
+# file in the cache directory, publish that, then rename it into place, so
+# that other processes never see a half-written image.
+# After each new figure, the least-recently-used images (apart from the new
+# one) are deleted until the cache is smaller than `maxsize` (in bytes).
+# Only files named like a key are ever deleted, so anything else in the
+# directory (including another process's temporary files) is left alone:
+
+CACHED_NAME = re.compile(r'\A[0-9a-f]{40}\.png\Z')
+
+
+class FigureCache(object):
+    def __init__(self, path, maxsize=100 * 2**20):
+        self.path = path
+        self.maxsize = maxsize
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def key(self, draw, *data, **style):
+        h = hashlib.sha1()
+        h.update(repr((gwpy.__version__, matplotlib.__version__,
+                       sorted(style.items()))).encode('utf-8'))
+        hash_function(h, draw)
+        hash_data(h, data)
+        return h.hexdigest()
+
+    def render(self, filename, draw, *data, **style):
+        cached = os.path.join(self.path, '%s.png'
+                              % self.key(draw, *data, **style))
+        try:
+            os.utime(cached, None)
+            self._publish(cached, filename)
+            return True
+        except FileNotFoundError:
+            pass
+        plot = draw(*data, **style)
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.path)
+        os.close(fd)
+        try:
+            plot.save(tmp, format='png')
+            self._publish(tmp, filename)
+            os.replace(tmp, cached)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        finally:
+            pyplot.close(plot)
+        self.evict(keep=cached)
+        return False
+
+    def _publish(self, source, filename):
+        fd, tmp = tempfile.mkstemp(
+            suffix='.tmp', dir=os.path.dirname(os.path.abspath(filename)))
+        os.close(fd)
+        try:
+            os.remove(tmp)  # `os.link` needs a name that doesn't exist
+            try:
+                os.link(source, tmp)
+            except FileNotFoundError:  # source deleted, let the caller redraw
+                raise
+            except OSError:
+                shutil.copyfile(source, tmp)
+            os.replace(tmp, filename)
+        finally:
+            # `os.replace` does nothing if both names are already links to
+            # the same file, so we always tidy up
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def evict(self, keep=None):
+        stats = []
+        total = 0
+        for name in os.listdir(self.path):
+            f = os.path.join(self.path, name)
+            if not CACHED_NAME.match(name):
+                continue
+            try:  # another process may have just deleted it
+                stat = os.stat(f)
+            except FileNotFoundError:
+                continue
+            total += stat.st_size
+            if f != keep:
+                stats.append((stat.st_mtime, stat.st_size, f))
+        stats.sort()
+        for mtime, size, f in stats:
+            if total <= self.maxsize:
+                break
+            try:
+                os.remove(f)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+# .. note::
+#
+#    Anything the drawing function uses should be passed in as an argument
+#    (data) or a keyword argument (style), since global variables used
+#    inside the function aren't part of the key.
+#
+# To use the cache, we write the drawing code from the
+# `BLRMS example <5-blrms.html>`_ as a function:
+
+
+def draw_blrms(lho, llo, title=None):
+    from gwpy.plotter import TimeSeriesPlot
+    plot = TimeSeriesPlot(lho, llo)
+    for ifo, ax in zip(['H1', 'L1'], plot.axes):
+        ax.legend(['X', 'Y', 'Z'])
+        ax.yaxis.set_label_position('right')
+        ax.set_ylabel(ifo, rotation=0, va='center', ha='left')
+        ax.set_yscale('log')
+    plot.text(0.1, 0.5, r'$1-3$\,Hz motion [nm/s]', rotation=90, fontsize=24,
+              ha='center', va='center')
+    plot.axes[0].set_title(title, fontsize=24)
+    return plot
+
+# fetch the data, as before:
+from gwpy.timeseries import TimeSeriesDict
+channels = [
+    '%s:ISI-BS_ST1_SENSCOR_GND_STS_X_BLRMS_30M_100M.mean,s-trend',
+    '%s:ISI-BS_ST1_SENSCOR_GND_STS_Y_BLRMS_30M_100M.mean,s-trend',
+    '%s:ISI-BS_ST1_SENSCOR_GND_STS_Z_BLRMS_30M_100M.mean,s-trend',
+]
+lho = TimeSeriesDict.fetch([c % 'H1' for c in channels],
+                           'Feb 13 2015 16:00', 'Feb 14 2015 04:00')
+llo = TimeSeriesDict.fetch([c % 'L1' for c in channels],
+                           'Feb 13 2015 16:00', 'Feb 14 2015 04:00')
+
+# and render the figure through the cache:
+cache = FigureCache('figure-cache')
+title = 'Magnitude 7.1 earthquake impact on LIGO'
+print(cache.render('blrms.png', draw_blrms, lho, llo, title=title))
+#False
+
+# The first time round the figure is drawn, but if we ask for the same
+# figure again, with the same data, it is just copied from the cache:
+print(cache.render('blrms.png', draw_blrms, lho, llo, title=title))
+#True
@@ -24,8 +24,17 @@ oaf = TimeSeries.fetch(
     'L1:OAF-CAL_DARM_DQ', int(gps)-5, int(gps) + 5)
 
 # Now we can call the `~gwpy.timeseries.TimeSeries.spectrogram2` method of
-# `oaf` to calculate our high-resolution `~gwpy.spectrogram.Spectrogram`
-specgram = oaf.spectrogram2(fftlength=0.1, overlap=0.095) ** (1/2.)
+# `oaf` to calculate our high-resolution `~gwpy.spectrogram.Spectrogram`.
+# The FFTs and averaging are done in double precision, but we don't need
+# that to make a colour-mapped plot, so we convert the result to single
+# precision (`float32`).
+# This doesn't reduce the memory used by `spectrogram2` itself (the
+# conversion briefly needs both copies), but it halves the memory of the
+# stored `specgram`, and of every array we derive from it (use `float64` if
+# you need the full precision):
+dtype = 'float32'
+specgram = oaf.spectrogram2(fftlength=0.1, overlap=0.095).astype(dtype)
+specgram = specgram ** (1/2.)
 
 # To whiten the `specgram` we can use the
 # :meth:`~gwpy.spectrogram.Spectrogram.ratio` method to divide by the
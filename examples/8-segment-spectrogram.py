@@ -25,30 +25,99 @@ locksegs = DataQualityFlag.query_dqsegdb(
 # - calculate an ASD `~gwpy.spectrogram.Spectrogram` for those data
 # - de-whiten the data into units of strain/rtHz
 #
+# Because we hold on to every spectrogram until the end, we store them in
+# single precision (`float32`), which is plenty for a colour-mapped plot.
+# Each spectrogram is still calculated in double precision (and the
+# de-whitening response too, so we convert back again after `zpk`), so this
+# doesn't change the peak memory of each calculation, but it halves the
+# memory needed to hold all of the results:
 from gwpy.timeseries import TimeSeries
+dtype = 'float32'
 specgrams = []
 for segment in locksegs.active:
     data = TimeSeries.fetch('H1:CAL-DELTAL_EXTERNAL_DQ', segment[0], segment[1])
-    sg = data.spectrogram(30, fftlength=8, overlap=4) ** (1/2.)
-    specgrams.append(sg.zpk([100.]*5, [1.]*5, 1e-10/4000.))
+    sg = data.spectrogram(30, fftlength=8, overlap=4).astype(dtype) ** (1/2.)
+    sg = sg.zpk([100.]*5, [1.]*5, 1e-10/4000.)
+    specgrams.append(sg.astype(dtype, copy=False))
 
-# To make a plot using multiple data sets, we first generate a blank plot:
+# To make a plot using multiple data sets, we could
+# `~gwpy.plotter.SpectrogramAxes.plot` each one in turn, but each call
+# creates a separate mesh, so for a full day of 30-second columns the plot
+# becomes very slow to draw, and the PNG file is huge.
+# Instead, we can composite all of the spectrograms onto a single image grid,
+# with one pixel per cell, using log-spaced frequency bins, and leaving the
+# gaps between segments masked.
+#
+# First, we define a function to average the rows of a 2-D array onto a new
+# set of bins, falling back to linear interpolation for bins that don't
+# contain any samples, which we will use to resample the frequency axis:
+import numpy
+
+
+def rebin(data, x, bins):
+    edges = numpy.searchsorted(x, bins)
+    counts = numpy.diff(edges)
+    csum = numpy.concatenate((numpy.zeros((1,) + data.shape[1:]),
+                              data.cumsum(axis=0)))
+    out = csum[edges[1:]] - csum[edges[:-1]]
+    full = counts > 0
+    out[full] /= counts[full][:, None]
+    centres = ((bins[:-1] + bins[1:]) / 2.)[~full]
+    i0 = numpy.clip(numpy.searchsorted(x, centres) - 1, 0, max(x.size - 2, 0))
+    i1 = numpy.minimum(i0 + 1, x.size - 1)
+    step = numpy.where(x[i1] > x[i0], x[i1] - x[i0], 1)
+    w = numpy.clip((centres - x[i0]) / step, 0, 1)[:, None]
+    out[~full] = data[i0] * (1 - w) + data[i1] * w
+    return out
+
+# Next, we define a function that resamples each spectrogram onto the
+# pixels of an image grid that it covers, leaving the rest masked.
+# In frequency we use `rebin`, but in time each pixel just takes the value
+# of the spectrogram column that contains it, exactly as if the columns had
+# been drawn one by one, rather than interpolating between neighbouring
+# columns:
+
+
+def composite(specgrams, tbins, fbins, dtype='float32'):
+    image = numpy.ma.masked_all((fbins.size - 1, tbins.size - 1), dtype=dtype)
+    tcentres = (tbins[:-1] + tbins[1:]) / 2.
+    for sg in specgrams:
+        x = numpy.nonzero((tcentres >= sg.span[0]) &
+                          (tcentres < sg.span[1]))[0]
+        if not x.size:
+            continue
+        data = rebin(sg.value.T, sg.frequencies.value, fbins).T
+        col = numpy.searchsorted(sg.times.value, tcentres[x],
+                                 side='right') - 1
+        keep = (col >= 0) & (col < data.shape[0])
+        image[:, x[keep]] = data[col[keep]].T
+    return image
+
+# Then we define the output grid, with one bin per pixel of the final image,
+# and composite the spectrograms onto it:
+start, end = locksegs.known[0][0], locksegs.known[-1][-1]
+fmin, fmax = 40, 4000
+nx, ny = 1200, 600
+tbins = numpy.linspace(start, end, nx + 1)
+fbins = numpy.logspace(numpy.log10(fmin), numpy.log10(fmax), ny + 1)
+image = composite(specgrams, tbins, fbins, dtype=dtype)
+
+# Now we can generate a blank plot, and draw the whole grid as a single,
+# rasterized, artist, so that the rendering time depends only on the size
+# of the grid, not on the number of spectrograms:
 from gwpy.plotter import SpectrogramPlot
 plot = SpectrogramPlot()
 ax = plot.gca()
-
-# then `~gwpy.plotter.SpectrogramAxes.plot` each data set in turn:
-for sg in specgrams:
-    ax.plot(sg)
-    print(sg)
+mesh = ax.pcolormesh(tbins, fbins, image, rasterized=True)
 
 # To finish off, we customise the plot to make it look better
 ax.grid(which='both')
-ax.set_xlim(locksegs.known[0][0], locksegs.known[-1][-1])
-ax.set_epoch(locksegs.known[0][0])
+ax.set_xlim(start, end)
+ax.set_epoch(start)
 ax.set_yscale('log')
-ax.set_ylim(40, 4000)
+ax.set_ylim(fmin, fmax)
 ax.set_title('LIGO Hanford $h(t)$')
-plot.add_colorbar(log=True, clim=[1e-24, 1e-19], label=r'[strain/\rtHz]')
+plot.add_colorbar(mappable=mesh, log=True, clim=[1e-24, 1e-19],
+                  label=r'[strain/\rtHz]')
 plot.add_state_segments(locksegs, plotargs={'label': 'Lock'})
 plot.show()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2015)
+
+"""How to track Guardian state segments from a live data stream
+
+In the `Guardian segments example <4-guardian-segments.html>`_ we converted
+a fixed 12-hour record of the `H1:GRD-ISC_LOCK_STATE_N` channel into
+segments in a single step.
+For live lock monitoring that doesn't scale: each time new data arrive
+we would have to redo the whole conversion.
+
+In this example we build a small incremental tracker that keeps only the
+currently-open state 'run', and turns each new block of data into closed
+segments and lockloss times, so the cost of an update depends only on the
+size of the new block, not how long the monitor has been running.
+
+"""
+
+__author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
+__currentmodule__ = 'gwpy.timeseries'
+
+# First, we import the objects we need:
+import numpy
+from gwpy.segments import (DataQualityFlag, Segment)
+
+# Next we define the tracker.
+# For each new block we find the sample indices where the state changes
+# using `numpy`, every run in the block except the last one is closed and
+# is recorded as a segment for the relevant state, and the last run is
+# kept open, waiting for the next block.
+# The `known` segments of each flag are only extended up to the start of
+# the open run, so each `~gwpy.segments.DataQualityFlag` is always complete
+# as far as it goes.
+# When the stream ends, `flush` closes the open run at the end of the data:
+
+
+class GuardianSegmentTracker(object):
+    def __init__(self, states, lockloss=2, prefix='H1:GRD-ISC_LOCK'):
+        self.flags = dict((state, DataQualityFlag(name='%s:%d' % (prefix, state)))
+                          for state in states)
+        self.lockloss = lockloss
+        self.locklosses = []
+        self.state = None  # value of the open run
+        self.start = None  # GPS start time of the open run
+        self.end = None  # GPS end time of the data seen so far
+
+    def _close(self, state, start, end, closed):
+        state = int(state)
+        if state in self.flags and end > start:
+            segment = Segment(float(start), float(end))
+            self.flags[state].active.append(segment)
+            closed.append((state, segment))
+
+    def _extend_known(self, start, end):
+        if end <= start:
+            return
+        start, end = float(start), float(end)
+        for flag in self.flags.values():
+            # extend the last known segment in place, rather than
+            # coalescing the whole (ever-growing) list
+            if flag.known and flag.known[-1][1] >= start:
+                flag.known[-1] = Segment(flag.known[-1][0], end)
+            else:
+                flag.known.append(Segment(start, end))
+
+    def append(self, block):
+        values = numpy.asarray(block.value)
+        if not values.size:
+            return [], []
+        times = numpy.asarray(block.times.value, dtype=float)
+        start, end = map(float, block.span)
+        closed = []
+        # if the new block doesn't follow on from the last one, close the
+        # open run at the end of the old data
+        if self.state is not None and start != self.end:
+            self._close(self.state, self.start, self.end, closed)
+            self._extend_known(self.start, self.end)
+            self.state = None
+        # find the start index, value, and GPS time of each run in this block
+        idx = numpy.concatenate(([0], numpy.nonzero(values[1:] != values[:-1])[0] + 1))
+        runvals = values[idx].astype(int)
+        runstarts = times[idx]
+        runstarts[0] = start
+        # does the first run continue the open run from the last block?
+        continued = self.state is not None and runvals[0] == self.state
+        if continued:
+            runstarts[0] = self.start
+        elif self.state is not None:
+            self._close(self.state, self.start, start, closed)
+        settled = self.start if self.state is not None else start
+        # close every run except the last one
+        for i in range(runvals.size - 1):
+            self._close(runvals[i], runstarts[i], runstarts[i+1], closed)
+        # record the start of every new lockloss run
+        newlockloss = runvals == self.lockloss
+        newlockloss[0] &= not continued
+        locklosses = runstarts[newlockloss].tolist()
+        self.locklosses.extend(locklosses)
+        # and keep the last run open
+        self.state, self.start, self.end = (int(runvals[-1]),
+                                            float(runstarts[-1]), end)
+        self._extend_known(settled, self.start)
+        return closed, locklosses
+
+    def flush(self):
+        closed = []
+        if self.state is not None:
+            self._close(self.state, self.start, self.end, closed)
+            self._extend_known(self.start, self.end)
+            self.state = self.start = None
+        return closed
+
+# Now we can use the tracker.
+# For this example we will simulate a live stream by fetching the same data
+# used in the original example, and feeding it to the tracker one minute at
+# a time:
+from gwpy.timeseries import TimeSeries
+lockstate = TimeSeries.fetch(
+    'H1:GRD-ISC_LOCK_STATE_N', 'March 10 2015', 'March 10 2015 12:00')
+
+tracker = GuardianSegmentTracker([500, 2])
+stride = int(60 * lockstate.sample_rate.value)
+for i in range(0, lockstate.size, stride):
+    closed, locklosses = tracker.append(lockstate[i:i+stride])
+closed = tracker.flush()
+
+# In a real monitor, each `block` would be the latest data from NDS2 or
+# from the frames, and the `closed` segments and `locklosses` would be
+# pushed straight to the dashboard.
+#
+# Once all of the data have been processed, and the last run has been closed
+# with `flush`, we get the same locklosses as we did in the batch example:
+print(tracker.locklosses)
+
+# with the DC readout and lockloss segments available as
+# `~gwpy.segments.DataQualityFlag` objects:
+dcsegs = tracker.flags[500]
+locklosssegs = tracker.flags[2]
+
+# Finally, we can plot the segments, as before:
+from gwpy.plotter import SegmentPlot
+plot = SegmentPlot(dcsegs, locklosssegs, known=None)
+plot.set_title('H1 lock segments and locklosses (live)')
+plot.show()